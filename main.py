@@ -4,14 +4,58 @@ Standalone Py-KMS with WebUI, logs, and auto-install dependencies
 Entry point for the py-kms application with enhanced web interface
 """
 
+import atexit
+import functools
+import hashlib
+import importlib.util
+import json
+import socket
 import subprocess
 import sys
 import os
+import signal
 import threading
 import time
 import webbrowser
+from collections import deque
+from datetime import datetime
 from pathlib import Path
 
+# Paths are resolved once; nothing relies on the working directory
+HERE = Path(__file__).resolve().parent
+PYKMS_DIR = HERE / 'py-kms'
+LOG_PATH = HERE / 'kms_logs.txt'
+DB_PATH = HERE / 'pykms_database.db'
+LICENSE_PATH = HERE / 'LICENSE'
+DEPS_MARKER_PATH = HERE / '.deps_ok'
+
+# Make the py-kms modules importable
+sys.path.insert(0, str(PYKMS_DIR))
+
+# WebUI dependencies are only needed by the gunicorn process (which imports
+# this module as `main:app`); the launcher skips them so it stays light and
+# can install them with install_dependencies() first
+if __name__ != "__main__":
+    from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, make_response
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    # Import py-kms modules
+    try:
+        from pykms_DB2Dict import kmsDB2Dict
+        from pykms_Sql import sql_get_all
+    except ImportError as e:
+        print(f"Warning: Could not import some py-kms modules: {e}")
+        kmsDB2Dict = None
+        sql_get_all = None
+
+# Shared append handle for kms_logs.txt, opened on first use by log_command()
+_log_handle = None
+_log_lock = threading.Lock()
+
 # Dependency Auto-Install
 def install_dependencies():
     """Auto-install required packages if not available"""
@@ -20,25 +64,47 @@ def install_dependencies():
         "flask": "flask",
         "gunicorn": "gunicorn", 
         "dnspython": "dns",  # dnspython imports as 'dns'
-        "tzlocal": "tzlocal"
+        "tzlocal": "tzlocal",
+        "orjson": "orjson"
     }
     
+    # Skip the probe on warm starts if nothing changed since the last successful check
+    # (per interpreter, so another venv with the same Python version re-probes)
+    marker_file = DEPS_MARKER_PATH
+    marker_key = hashlib.sha1(
+        repr(sorted(package_mapping.items())).encode() + sys.version.encode()
+        + sys.executable.encode()
+    ).hexdigest()
+    try:
+        if marker_file.read_text() == marker_key:
+            return True
+    except OSError:
+        pass
+    
     missing_packages = []
     for pkg, import_name in package_mapping.items():
-        try:
-            __import__(import_name)
+        # Only look the module up, importing it would run its top-level code
+        if importlib.util.find_spec(import_name) is not None:
             print(f"✓ {pkg} is available")
-        except ImportError:
+        else:
             missing_packages.append(pkg)
             print(f"✗ {pkg} is missing")
     
     if missing_packages:
         print(f"Installing missing packages: {missing_packages}")
         try:
-            # Try to install missing packages
-            for pkg in missing_packages:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", pkg, "--break-system-packages"])
-                print(f"✓ Successfully installed {pkg}")
+            # Install all missing packages in a single pip run
+            env = {
+                **os.environ,
+                'PIP_CACHE_DIR': str(HERE / '.pip-cache'),
+                'PIP_DISABLE_PIP_VERSION_CHECK': '1'
+            }
+            subprocess.check_call(
+                [sys.executable, "-m", "pip", "install", "--break-system-packages",
+                 "--prefer-binary", *missing_packages],
+                env=env
+            )
+            print(f"✓ Successfully installed {', '.join(missing_packages)}")
         except subprocess.CalledProcessError as e:
             print(f"Warning: Could not install packages automatically: {e}")
             print("Please install them manually using: pip install " + " ".join(missing_packages))
@@ -46,38 +112,62 @@ def install_dependencies():
     else:
         print("All required dependencies are available!")
     
+    try:
+        marker_file.write_text(marker_key)
+    except OSError as e:
+        print(f"Warning: Could not write dependency marker: {e}")
+    
     return True
 
 def setup_environment():
     """Setup environment variables and paths"""
-    # Change to py-kms directory
-    pykms_dir = Path(__file__).parent / 'py-kms'
-    os.chdir(pykms_dir)
-    sys.path.insert(0, str(pykms_dir))
-    
     # Set required environment variables
-    os.environ['PYKMS_SQLITE_DB_PATH'] = str(Path(__file__).parent / 'pykms_database.db')
-    os.environ['PYKMS_LICENSE_PATH'] = str(Path(__file__).parent / 'LICENSE')
-    os.environ['PYKMS_LOGS_PATH'] = str(Path(__file__).parent / 'kms_logs.txt')
+    os.environ['PYKMS_SQLITE_DB_PATH'] = str(DB_PATH)
+    os.environ['PYKMS_LICENSE_PATH'] = str(LICENSE_PATH)
+    os.environ['PYKMS_LOGS_PATH'] = str(LOG_PATH)
 
 def start_kms_server_background():
     """Start KMS server in background"""
     try:
         print("Starting KMS server in background...")
         
-        # Create logs directory if it doesn't exist
-        log_file = Path(__file__).parent / 'kms_logs.txt'
+        # Run the server in a thread of this process, logging to kms_logs.txt
+        import pykms_Server
         
+        # pykms_Server reads its options from the command line
+        argv = sys.argv
+        sys.argv = ['pykms_Server.py', '0.0.0.0', '1688', '-V', 'INFO', '-F', str(LOG_PATH)]
+        try:
+            pykms_Server.server_options()
+            pykms_Server.server_check()
+        finally:
+            sys.argv = argv
+        
+        # Start serving on the thread pykms_Server spawned at import, as
+        # server_main_terminal() does, rather than adding another one
+        server_thread = pykms_Server.serverthread
+        server_thread.checked = True
+        pykms_Server.serverqueue.put('start')
+        
+        print(f"KMS server started in thread: {server_thread.name}")
+        print(f"Logs will be written to: {LOG_PATH}")
+        
+        return server_thread
+        
+    except (Exception, SystemExit) as e:
+        print(f"Could not start KMS server in-process ({e}), falling back to a subprocess...")
+    
+    try:
         # Start server with logging
         server_process = subprocess.Popen(
             [sys.executable, 'pykms_Server.py', '0.0.0.0', '1688', '-V', 'INFO'],
-            stdout=open(log_file, 'w'),
+            stdout=open(LOG_PATH, 'w'),
             stderr=subprocess.STDOUT,
-            cwd=Path(__file__).parent / 'py-kms'
+            cwd=PYKMS_DIR
         )
         
         print(f"KMS server started with PID: {server_process.pid}")
-        print(f"Logs will be written to: {log_file}")
+        print(f"Logs will be written to: {LOG_PATH}")
         
         # Give server time to start
         time.sleep(2)
@@ -88,35 +178,30 @@ def start_kms_server_background():
         print(f"Error starting KMS server: {e}")
         return None
 
+def get_display_ip():
+    """Get the local IP address shown to users"""
+    try:
+        # Ask the routing table for the outgoing address; a UDP connect to an
+        # IP literal sends no packets and needs no DNS, so it cannot stall
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"  # Fallback to localhost
+
 def create_enhanced_webui():
     """Create enhanced WebUI with additional features"""
-    from flask import Flask, render_template, request, jsonify, redirect, url_for
-    import json
-    from datetime import datetime
-    
-    # Import py-kms modules
-    try:
-        from pykms_DB2Dict import kmsDB2Dict
-        from pykms_Sql import sql_get_all
-    except ImportError as e:
-        print(f"Warning: Could not import some py-kms modules: {e}")
-        kmsDB2Dict = None
-        sql_get_all = None
-    
     app = Flask(__name__, template_folder='py-kms/templates', static_folder='py-kms/static')
     
-    # Get actual IP address for display
-    def get_display_ip():
-        import socket
-        try:
-            # Get local IP by connecting to a remote address (doesn't actually connect)
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            local_ip = s.getsockname()[0]
-            s.close()
-            return local_ip
-        except Exception:
-            return "127.0.0.1"  # Fallback to localhost
+    # Templates ship with the app, so skip per-render stat() checks and
+    # compile the home page now rather than on the first request
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    app.jinja_env.get_template('enhanced_home.html')
+    
+    # Changes whenever a release ships a different home page template
+    template_source = app.jinja_env.loader.get_source(app.jinja_env, 'enhanced_home.html')[0]
+    template_digest = hashlib.md5(template_source.encode()).hexdigest()
     
     # Global variables for server config
     server_config = {
@@ -126,49 +211,145 @@ def create_enhanced_webui():
         'display_ip': get_display_ip()  # Actual IP for display
     }
     
+    def json_response(data):
+        """Serialize hot API responses with orjson when it is available"""
+        if orjson is None:
+            return jsonify(data)
+        return app.response_class(orjson.dumps(data), mimetype='application/json')
+    
+    # Products embed the server address in their commands, so they are cached
+    # per config version and rebuilt lazily after a config change. The lock
+    # keeps a rebuild from racing a config change
+    products_cache = {
+        'config_version': 0,
+        'products': None,
+        'digest': None
+    }
+    products_lock = threading.RLock()
+    
     @app.route('/')
     def home():
         """Enhanced home page with server info and products"""
         try:
-            # Get KMS products if available
-            products = {}
-            if kmsDB2Dict:
-                try:
-                    kms_data = kmsDB2Dict()
-                    products = extract_products_from_db(kms_data)
-                except Exception as e:
-                    print(f"Error loading KMS products: {e}")
-            
-            # Get recent logs
-            logs = get_recent_logs(50)
+            # The page only changes with the server config, the products and
+            # the template (logs are fetched by the page itself), so let
+            # browsers revalidate instead of re-rendering the template
+            with products_lock:
+                products, products_digest = get_products()
+                config = dict(server_config)
+                config_version = products_cache['config_version']
+            etag = hashlib.md5(
+                f"{config_version}:{sorted(config.items())}:"
+                f"{products_digest}:{template_digest}".encode()
+            ).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
             
-            return render_template('enhanced_home.html', 
-                                   server_config=server_config,
-                                   products=products,
-                                   logs=logs)
+            response = make_response(render_template('enhanced_home.html', 
+                                                     server_config=config,
+                                                     products=products))
+            response.set_etag(etag)
+            return response
         except Exception as e:
             return f"Error loading home page: {e}", 500
     
+    @functools.lru_cache(maxsize=None)
+    def static_version(filename):
+        """Short content hash of a static file, used to version its URL"""
+        try:
+            return hashlib.md5((Path(app.static_folder) / filename).read_bytes()).hexdigest()[:12]
+        except OSError:
+            return None
+    
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        """Append ?v=<content hash> to static URLs so a changed file gets a new URL"""
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = static_version(values['filename'])
+            if version:
+                values['v'] = version
+    
+    @app.after_request
+    def add_cache_headers(response):
+        """Let browsers cache versioned static assets for good"""
+        if request.endpoint == 'static' and 'v' in request.args:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    
     @app.route('/api/logs')
     def get_logs_api():
-        """API endpoint for live log updates"""
-        logs = get_recent_logs(100)
-        return jsonify(logs)
+        """API endpoint for live log updates, as plain text one line per log entry"""
+        with log_condition:
+            logs = get_recent_logs(100)
+            seq = log_state['seq']
+        # X-Log-Seq lets the page resume the log stream right after these lines
+        return Response('\n'.join(line.rstrip() for line in logs), mimetype='text/plain',
+                        headers={'X-Log-Seq': str(seq)})
+    
+    @app.route('/api/logs/stream')
+    def stream_logs_api():
+        """Server-Sent Events stream pushing new log lines as they are read"""
+        # Each stream holds a gunicorn thread, leave the rest for other requests
+        if not log_stream_slots.acquire(blocking=False):
+            return Response('Too many log streams', status=503, mimetype='text/plain')
+        
+        # Resume after the last line the client has seen, if it tells us
+        with log_condition:
+            seen = log_state['seq']
+        start = request.headers.get('Last-Event-ID') or request.args.get('since')
+        if start and start.isdigit() and int(start) <= seen:
+            seen = int(start)
+        
+        def generate(seen):
+            # Streams are closed after a while; every message carries the line
+            # counter as its id, so EventSource reconnects without losing lines
+            deadline = time.monotonic() + 300
+            yield f": connected\nretry: 3000\nid: {seen}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                with log_condition:
+                    log_condition.wait_for(lambda: log_state['seq'] != seen or log_state['closed'],
+                                           timeout=min(15, remaining))
+                    if log_state['closed']:
+                        return
+                    new = min(log_state['seq'] - seen, len(log_buffer))
+                    lines = list(log_buffer)[len(log_buffer) - new:] if new > 0 else []
+                    seen = log_state['seq']
+                
+                if lines:
+                    events = [f"data: {json.dumps(line)}\n\n" for line in lines]
+                    events[-1] = f"id: {seen}\n" + events[-1]
+                    yield ''.join(events)
+                else:
+                    # Keep-alive comment, also lets the server notice closed clients
+                    yield f": keep-alive\nid: {seen}\n\n"
+        
+        response = Response(generate(seen), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache'})
+        response.call_on_close(log_stream_slots.release)
+        return response
     
     @app.route('/api/server/config', methods=['GET', 'POST'])
     def server_config_api():
         """API endpoint for server configuration"""
         if request.method == 'POST':
             data = request.get_json()
-            server_config['ip'] = data.get('ip', '0.0.0.0')
-            server_config['port'] = data.get('port', '1688')
+            with products_lock:
+                server_config['ip'] = data.get('ip', '0.0.0.0')
+                server_config['port'] = data.get('port', '1688')
+                products_cache['config_version'] += 1
+                products_cache['products'] = None
             
             # Log the configuration change
             log_command(f"Server configuration changed to {server_config['ip']}:{server_config['port']}")
             
-            return jsonify(server_config)
+            return json_response(server_config)
         
-        return jsonify(server_config)
+        return json_response(server_config)
     
     @app.route('/api/execute_command', methods=['POST'])
     def execute_command():
@@ -181,14 +362,13 @@ def create_enhanced_webui():
             return jsonify({'error': 'No command provided'}), 400
         
         try:
-            # Log the command execution
-            log_entry = f"[{datetime.now()}] Executing: {command} for product: {product_name}"
-            log_command(log_entry)
-            
             # Execute the command (simulated for safety)
             result = f"Command executed: {command}"
             
-            log_command(f"[{datetime.now()}] Result: {result}")
+            # Log the command execution and its result with a single write
+            timestamp = datetime.now()
+            log_command(f"[{timestamp}] Executing: {command} for product: {product_name}\n"
+                        f"[{timestamp}] Result: {result}")
             
             return jsonify({
                 'success': True,
@@ -206,24 +386,25 @@ def create_enhanced_webui():
         """Extract products and GVLK keys from KMS database"""
         products = {}
         
-        def extract_items(item):
-            if isinstance(item, list):
-                for i in item:
-                    extract_items(i)
-            elif isinstance(item, dict):
-                if 'KmsItems' in item:
-                    extract_items(item['KmsItems'])
-                elif 'SkuItems' in item:
-                    extract_items(item['SkuItems'])
-                elif 'Gvlk' in item and 'DisplayName' in item:
-                    if item['Gvlk']:
-                        products[item['DisplayName']] = {
-                            'gvlk': item['Gvlk'],
-                            'commands': generate_commands(item['DisplayName'], item['Gvlk'])
-                        }
-        
         try:
-            extract_items(kms_data)
+            # Walk the tree with an explicit stack; lists are pushed reversed
+            # so products keep their database order
+            stack = deque([kms_data])
+            while stack:
+                item = stack.pop()
+                if isinstance(item, list):
+                    stack.extend(reversed(item))
+                elif isinstance(item, dict):
+                    if 'KmsItems' in item:
+                        stack.append(item['KmsItems'])
+                    elif 'SkuItems' in item:
+                        stack.append(item['SkuItems'])
+                    elif 'Gvlk' in item and 'DisplayName' in item:
+                        if item['Gvlk']:
+                            products[item['DisplayName']] = {
+                                'gvlk': item['Gvlk'],
+                                'commands': generate_commands(item['DisplayName'], item['Gvlk'])
+                            }
         except Exception as e:
             print(f"Error extracting products: {e}")
         
@@ -243,286 +424,115 @@ def create_enhanced_webui():
         }
     
     def get_recent_logs(lines=50):
-        """Get recent logs from the KMS server"""
-        try:
-            log_file = Path(__file__).parent / 'kms_logs.txt'
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    all_lines = f.readlines()
-                    return all_lines[-lines:] if len(all_lines) > lines else all_lines
-        except Exception as e:
-            print(f"Error reading logs: {e}")
-        
-        return []
+        """Get recent logs from the in-memory buffer filled by tail_logs()"""
+        with log_condition:
+            return list(log_buffer)[-lines:]
+    
+    def tail_logs():
+        """Follow the KMS server log file into the in-memory log buffer"""
+        while True:
+            try:
+                with open(LOG_PATH, 'rb') as f:
+                    # Seed the buffer with the tail of what is already logged
+                    size = os.fstat(f.fileno()).st_size
+                    chunk = min(size, 64 * 1024)
+                    f.seek(size - chunk)
+                    data = f.read(chunk)
+                    if size > chunk:
+                        # First line is most likely cut in half by the seek
+                        data = data.partition(b'\n')[2]
+                    # Keep an unterminated last line until the rest is written
+                    cut = data.rfind(b'\n') + 1
+                    data, pending = data[:cut], data[cut:]
+                    with log_condition:
+                        log_buffer.clear()
+                        if data:
+                            seeded = data.decode('utf-8', 'replace').splitlines(keepends=True)
+                            log_buffer.extend(seeded)
+                            log_state['seq'] += len(seeded)
+                        log_condition.notify_all()
+                    
+                    while True:
+                        line = f.readline()
+                        if line:
+                            pending += line
+                            if pending.endswith(b'\n'):
+                                with log_condition:
+                                    log_buffer.append(pending.decode('utf-8', 'replace'))
+                                    log_state['seq'] += 1
+                                    log_condition.notify_all()
+                                pending = b''
+                        elif LOG_PATH.stat().st_size < f.tell():
+                            # File was truncated, start over
+                            break
+                        else:
+                            time.sleep(0.2)
+            except OSError:
+                # Log file not created yet (or removed), try again shortly
+                time.sleep(1)
+            except Exception as e:
+                print(f"Error reading logs: {e}")
+                time.sleep(1)
     
     def log_command(message):
         """Log command execution to file"""
+        global _log_handle
         try:
-            log_file = Path(__file__).parent / 'kms_logs.txt'
-            with open(log_file, 'a') as f:
-                f.write(f"{message}\n")
+            with _log_lock:
+                if _log_handle is None:
+                    _log_handle = open(LOG_PATH, 'a', buffering=1)
+                    atexit.register(_log_handle.close)
+                _log_handle.write(f"{message}\n")
         except Exception as e:
             print(f"Error logging command: {e}")
     
+    def get_products():
+        """Get extracted products and their digest, rebuilding them if the server config changed"""
+        with products_lock:
+            if products_cache['products'] is None:
+                products = {}
+                if kms_data is not None:
+                    products = extract_products_from_db(kms_data)
+                products_cache['digest'] = hashlib.md5(
+                    json.dumps(products, sort_keys=True).encode()
+                ).hexdigest()
+                products_cache['products'] = products
+            return products_cache['products'], products_cache['digest']
+    
+    # The KMS database is static, so load it once instead of per request
+    kms_data = None
+    if kmsDB2Dict:
+        try:
+            kms_data = kmsDB2Dict()
+        except Exception as e:
+            print(f"Error loading KMS products: {e}")
+    get_products()
+    
+    # A single reader tails the log file, so /api/logs never touches the disk
+    # log_state['seq'] counts lines ever added, so streams can tell what is new
+    log_buffer = deque(maxlen=1000)
+    log_state = {'seq': 0, 'closed': False}
+    log_condition = threading.Condition()
+    log_stream_slots = threading.BoundedSemaphore(16)
+    threading.Thread(target=tail_logs, daemon=True).start()
+    
+    def close_log_streams():
+        """End all open log streams, e.g. when the worker shuts down"""
+        with log_condition:
+            log_state['closed'] = True
+            log_condition.notify_all()
+    
+    app.extensions['close_log_streams'] = close_log_streams
+    
     return app
 
-def create_enhanced_template():
-    """Create enhanced HTML template for the home page if it doesn't exist"""
-    # Check if template already exists to avoid redundant writes
-    template_path = Path(__file__).parent / 'py-kms' / 'templates' / 'enhanced_home.html'
-    if template_path.exists():
-        print("Enhanced template already exists, skipping creation...")
-        return
-    template_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Py-KMS Server & WebUI</title>
-    <link rel="stylesheet" href="{{ url_for('static', filename='css/bulma.min.css') }}">
-    <style>
-        .server-status { margin: 1rem 0; }
-        .product-card { margin: 1rem 0; cursor: pointer; transition: all 0.3s ease; }
-        .product-card:hover { box-shadow: 0 4px 12px rgba(0,0,0,0.15); }
-        .product-header { display: flex; justify-content: space-between; align-items: center; }
-        .expand-icon { transition: transform 0.3s ease; }
-        .expanded .expand-icon { transform: rotate(180deg); }
-        .commands-section { display: none; margin-top: 1rem; }
-        .commands-section.show { display: block; }
-        .command-box { background: #f5f5f5; padding: 1rem; border-radius: 5px; margin: 0.5rem 0; position: relative; }
-        .command-text { background: #fff; padding: 0.5rem; border-radius: 3px; border: 1px solid #ddd; margin: 0.5rem 0; font-family: monospace; word-break: break-all; }
-        .copy-button { position: absolute; top: 0.5rem; right: 0.5rem; }
-        .log-container { background: #000; color: #00ff00; padding: 1rem; height: 300px; overflow-y: scroll; font-family: monospace; }
-        .highlight-ip { background: yellow; font-weight: bold; }
-        .gvlk-key { background: #fff; padding: 0.5rem; border-radius: 3px; border: 1px solid #ddd; font-family: monospace; display: inline-block; position: relative; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <section class="section">
-            <h1 class="title">Py-KMS Server & WebUI</h1>
-            
-            <!-- Server Status -->
-            <div class="box server-status">
-                <h2 class="subtitle">Server Status</h2>
-                <p><strong>IP Address:</strong> <span class="highlight-ip">{{ server_config.display_ip if server_config.ip == '0.0.0.0' else server_config.ip }}</span></p>
-                <p><strong>Port:</strong> {{ server_config.port }}</p>
-                <p><strong>Status:</strong> 
-                    <span class="tag is-success">{{ server_config.status.title() }}</span>
-                </p>
-                
-                <div class="field is-grouped">
-                    <div class="control">
-                        <input class="input" type="text" id="server-ip" placeholder="Server IP" value="{{ server_config.ip }}">
-                    </div>
-                    <div class="control">
-                        <input class="input" type="text" id="server-port" placeholder="Port" value="{{ server_config.port }}">
-                    </div>
-                    <div class="control">
-                        <button class="button is-primary" onclick="updateServerConfig()">Update</button>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- KMS Products -->
-            <div class="box">
-                <h2 class="subtitle">KMS Products ({{ products|length }} available)</h2>
-                <p class="help">Click on a product to view activation commands</p>
-                {% for product_name, product_data in products.items() %}
-                <div class="card product-card" onclick="toggleCommands('{{ loop.index }}')">
-                    <div class="card-content">
-                        <div class="product-header">
-                            <div>
-                                <h3 class="title is-5">{{ product_name }}</h3>
-                                <p><strong>GVLK Key:</strong> 
-                                    <span class="gvlk-key" id="gvlk-{{ loop.index }}">{{ product_data.gvlk }}</span>
-                                    <button class="button is-small is-text copy-button" onclick="event.stopPropagation(); copyToClipboard('gvlk-{{ loop.index }}', this)" title="Copy GVLK Key">📋</button>
-                                </p>
-                            </div>
-                            <span class="expand-icon">▼</span>
-                        </div>
-                        
-                        <div class="commands-section" id="commands-{{ loop.index }}">
-                            <h4 class="subtitle is-6">Activation Commands:</h4>
-                            
-                            <div class="command-box">
-                                <button class="button is-small is-light copy-button" onclick="event.stopPropagation(); copyToClipboard('cmd1-{{ loop.index }}', this)" title="Copy Command">📋</button>
-                                <p><strong>1. Install GVLK Key:</strong></p>
-                                <div class="command-text" id="cmd1-{{ loop.index }}">{{ product_data.commands.install_key }}</div>
-                                <button class="button is-small is-info" onclick="event.stopPropagation(); executeCommand('{{ product_data.commands.install_key }}', '{{ product_name }}')">Execute</button>
-                            </div>
-                            
-                            <div class="command-box">
-                                <button class="button is-small is-light copy-button" onclick="event.stopPropagation(); copyToClipboard('cmd2-{{ loop.index }}', this)" title="Copy Command">📋</button>
-                                <p><strong>2. Set KMS Server:</strong></p>
-                                <div class="command-text" id="cmd2-{{ loop.index }}">{{ product_data.commands.set_kms_server }}</div>
-                                <button class="button is-small is-info" onclick="event.stopPropagation(); executeCommand('{{ product_data.commands.set_kms_server }}', '{{ product_name }}')">Execute</button>
-                            </div>
-                            
-                            <div class="command-box">
-                                <button class="button is-small is-light copy-button" onclick="event.stopPropagation(); copyToClipboard('cmd3-{{ loop.index }}', this)" title="Copy Command">📋</button>
-                                <p><strong>3. Activate Windows:</strong></p>
-                                <div class="command-text" id="cmd3-{{ loop.index }}">{{ product_data.commands.activate }}</div>
-                                <button class="button is-small is-info" onclick="event.stopPropagation(); executeCommand('{{ product_data.commands.activate }}', '{{ product_name }}')">Execute</button>
-                            </div>
-                            
-                            <div class="command-box">
-                                <button class="button is-small is-light copy-button" onclick="event.stopPropagation(); copyToClipboard('cmd4-{{ loop.index }}', this)" title="Copy Command">📋</button>
-                                <p><strong>4. Check Status:</strong></p>
-                                <div class="command-text" id="cmd4-{{ loop.index }}">{{ product_data.commands.check_status }}</div>
-                                <button class="button is-small is-info" onclick="event.stopPropagation(); executeCommand('{{ product_data.commands.check_status }}', '{{ product_name }}')">Execute</button>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-            
-            <!-- Live Logs -->
-            <div class="box">
-                <h2 class="subtitle">Live Server Logs</h2>
-                <div class="log-container" id="log-container">
-                    {% for log_line in logs %}
-                    <div>{{ log_line|trim }}</div>
-                    {% endfor %}
-                </div>
-                <button class="button is-small" onclick="refreshLogs()">Refresh Logs</button>
-                <button class="button is-small" onclick="toggleAutoRefresh()">Toggle Auto-Refresh</button>
-            </div>
-        </section>
-    </div>
-    
-    <script>
-        let autoRefresh = false;
-        let refreshInterval;
-        
-        function toggleCommands(index) {
-            const commandsSection = document.getElementById('commands-' + index);
-            const card = commandsSection.closest('.product-card');
-            const expandIcon = card.querySelector('.expand-icon');
-            
-            if (commandsSection.classList.contains('show')) {
-                commandsSection.classList.remove('show');
-                card.classList.remove('expanded');
-            } else {
-                // Close all other expanded cards
-                document.querySelectorAll('.commands-section.show').forEach(section => {
-                    section.classList.remove('show');
-                    section.closest('.product-card').classList.remove('expanded');
-                });
-                
-                commandsSection.classList.add('show');
-                card.classList.add('expanded');
-            }
-        }
-        
-        function copyToClipboard(elementId, button) {
-            const element = document.getElementById(elementId);
-            const text = element.textContent || element.innerText;
-            
-            navigator.clipboard.writeText(text).then(function() {
-                // Visual feedback
-                const originalText = button.innerHTML;
-                button.innerHTML = '✓';
-                button.classList.add('is-success');
-                
-                setTimeout(function() {
-                    button.innerHTML = originalText;
-                    button.classList.remove('is-success');
-                }, 2000);
-            }).catch(function(err) {
-                // Fallback for older browsers
-                const textArea = document.createElement('textarea');
-                textArea.value = text;
-                document.body.appendChild(textArea);
-                textArea.select();
-                document.execCommand('copy');
-                document.body.removeChild(textArea);
-                
-                // Visual feedback
-                const originalText = button.innerHTML;
-                button.innerHTML = '✓';
-                button.classList.add('is-success');
-                
-                setTimeout(function() {
-                    button.innerHTML = originalText;
-                    button.classList.remove('is-success');
-                }, 2000);
-            });
-        }
-        
-        function updateServerConfig() {
-            const ip = document.getElementById('server-ip').value;
-            const port = document.getElementById('server-port').value;
-            
-            fetch('/api/server/config', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ ip: ip, port: port })
-            })
-            .then(response => response.json())
-            .then(data => {
-                alert('Server configuration updated!');
-                location.reload();
-            })
-            .catch(error => alert('Error updating config: ' + error));
-        }
-        
-        function executeCommand(command, product) {
-            fetch('/api/execute_command', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ command: command, product: product })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    alert('Command executed: ' + data.result);
-                    refreshLogs();
-                } else {
-                    alert('Error: ' + data.error);
-                }
-            })
-            .catch(error => alert('Error executing command: ' + error));
-        }
-        
-        function refreshLogs() {
-            fetch('/api/logs')
-            .then(response => response.json())
-            .then(logs => {
-                const container = document.getElementById('log-container');
-                container.innerHTML = logs.map(log => '<div>' + log.trim() + '</div>').join('');
-                container.scrollTop = container.scrollHeight;
-            })
-            .catch(error => console.error('Error refreshing logs:', error));
-        }
-        
-        function toggleAutoRefresh() {
-            autoRefresh = !autoRefresh;
-            if (autoRefresh) {
-                refreshInterval = setInterval(refreshLogs, 2000);
-            } else {
-                clearInterval(refreshInterval);
-            }
-        }
-        
-        // Initial log refresh
-        setTimeout(refreshLogs, 1000);
-    </script>
-</body>
-</html>'''
-    
-    # Create enhanced template
-    template_dir = Path(__file__).parent / 'py-kms' / 'templates'
-    template_dir.mkdir(exist_ok=True)
-    
-    with open(template_dir / 'enhanced_home.html', 'w') as f:
-        f.write(template_content)
-
 def main():
     """Main entry point"""
     print("=== Py-KMS Standalone with Enhanced WebUI ===")
     
+    # Treat SIGTERM like Ctrl+C so the shutdown below still runs
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
     try:
         # Install dependencies
         print("Checking and installing dependencies...")
@@ -533,17 +543,12 @@ def main():
         print("Setting up environment...")
         setup_environment()
         
-        # Create enhanced template
-        print("Creating enhanced WebUI template...")
-        create_enhanced_template()
-        
         # Start KMS server in background
         print("Starting KMS server...")
         server_process = start_kms_server_background()
         
-        # Create and run enhanced WebUI
+        # Run enhanced WebUI
         print("Starting enhanced WebUI...")
-        app = create_enhanced_webui()
         
         # Auto-open browser (optional)
         def open_browser():
@@ -564,21 +569,52 @@ def main():
         print("✓ Logs: Saved to kms_logs.txt")
         print("="*50 + "\n")
         
-        # Run Flask app
-        app.run(
-            host='0.0.0.0',
-            port=5000,
-            debug=False,
-            use_reloader=False
+        # Serve the WebUI through gunicorn; a single worker keeps server_config
+        # shared, while gthread threads handle concurrent clients (each open
+        # log stream holds one thread)
+        webui_process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn',
+             '-w', '1', '-k', 'gthread', '--threads', '32',
+             '--graceful-timeout', '5',
+             '-b', '0.0.0.0:5000', 'main:app'],
+            cwd=HERE
         )
+        returncode = webui_process.wait()
+        if returncode != 0:
+            print(f"Error: WebUI exited with status {returncode}")
+            # A missing dependency may be the cause, so re-probe on the next start
+            DEPS_MARKER_PATH.unlink(missing_ok=True)
+            sys.exit(returncode if returncode > 0 else 1)
         
     except KeyboardInterrupt:
         print("\nShutting down...")
-        if 'server_process' in locals() and server_process:
-            server_process.terminate()
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        # Never leave gunicorn (or the fallback server process) orphaned
+        if 'webui_process' in locals() and webui_process.poll() is None:
+            webui_process.terminate()
+            webui_process.wait()
+        # An in-process server thread is a daemon and exits along with us
+        if 'server_process' in locals() and isinstance(server_process, subprocess.Popen):
+            server_process.terminate()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+else:
+    # Imported by gunicorn as the WSGI entry point (main:app)
+    setup_environment()
+    app = create_enhanced_webui()
+    
+    # Open log streams would otherwise hold the worker's graceful shutdown
+    # until it times out, so end them as soon as gunicorn asks it to stop
+    _worker_sigterm = signal.getsignal(signal.SIGTERM)
+    
+    def _handle_sigterm(signum, frame):
+        app.extensions['close_log_streams']()
+        if callable(_worker_sigterm):
+            _worker_sigterm(signum, frame)
+    
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _handle_sigterm)
\ No newline at end of file